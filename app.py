@@ -2,42 +2,61 @@ import math
 import streamlit as st
 import pandas as pd
 import numpy as np
-import ifcopenshell
-import ifcopenshell.api
-import ifcopenshell.util.element as Element
-import matplotlib.pyplot as plt
-from collections import defaultdict
+from collections import defaultdict, Counter
+import functools
+import io
 import tempfile
 import os
-import plotly.express as px
-import plotly.graph_objects as go
+import atexit
+import shutil
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import logging
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
-from reportlab.lib.units import inch
-import plotly.io as pio
-import psutil
-import pprint
-
-pp = pprint.PrettyPrinter()
-
 # Setup logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
 
 # Utility Functions
 def handle_file_upload(upload_type, file_types):
     uploaded_file = st.file_uploader(f"Choose a {upload_type} file", type=file_types, key=upload_type)
     if uploaded_file:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=f'.{file_types[0]}') as tmp_file:
+        upload_id = getattr(uploaded_file, 'file_id', None) or (uploaded_file.name, uploaded_file.size)
+        staged = st.session_state.get(f'_staged_{upload_type}')
+        if staged and staged['id'] == upload_id:
+            # Same upload as the previous rerun; skip the rewrite and rehash
+            return staged['path'], uploaded_file.name, staged['hash']
+        tmp_dir = st.session_state.get('_tmpdir')
+        if tmp_dir is None:
+            # tmpfs keeps upload round-trips in RAM instead of hitting real disk
+            tmp_dir = tempfile.mkdtemp(dir='/dev/shm' if os.path.isdir('/dev/shm') else None)
+            st.session_state['_tmpdir'] = tmp_dir
+            atexit.register(shutil.rmtree, tmp_dir, ignore_errors=True)
+        tmp_file_path = os.path.join(tmp_dir, f'{upload_type}_{uploaded_file.name}')
+        with open(tmp_file_path, 'wb') as tmp_file:
             tmp_file.write(uploaded_file.getvalue())
-            tmp_file_path = tmp_file.name
-        return tmp_file_path, uploaded_file.name
-    return None, None
-
-def process_ifc_file(file_path):
+        # Hash once per upload; every cache key downstream reuses this digest
+        file_hash = get_file_hash(tmp_file_path)
+        st.session_state[f'_staged_{upload_type}'] = {'id': upload_id, 'path': tmp_file_path, 'hash': file_hash}
+        return tmp_file_path, uploaded_file.name, file_hash
+    return None, None, None
+
+def get_file_hash(file_path):
+    import hashlib
+    import mmap
+
+    with open(file_path, 'rb') as f:
+        try:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return hashlib.blake2b(mm).hexdigest()
+        except (ValueError, OSError):  # empty file or platform without mmap support
+            hasher = hashlib.blake2b()
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                hasher.update(chunk)
+            return hasher.hexdigest()
+
+@st.cache_resource(show_spinner=False)
+def process_ifc_file(file_path, file_hash=None):
+    import ifcopenshell
     try:
         return ifcopenshell.open(file_path)
     except Exception as e:
@@ -46,15 +65,23 @@ def process_ifc_file(file_path):
         st.error(error_message)
         return None
 
-def read_excel(file):
+def read_excel(file, **kwargs):
     try:
-        return pd.read_excel(file, engine='openpyxl')
+        try:
+            # Arrow-backed strings use a fraction of the RAM of object columns
+            return pd.read_excel(file, engine='calamine', dtype_backend='pyarrow', **kwargs)
+        except (ImportError, ValueError, TypeError):
+            return pd.read_excel(file, engine='openpyxl', **kwargs)
     except Exception as e:
         error_message = f"Failed to read Excel file: {e}"
         logging.error(error_message)
         st.error(error_message)
         return pd.DataFrame()
 
+@st.cache_data(show_spinner=False)
+def _read_excel_cached(file_hash, file_path):
+    return read_excel(file_path)
+
 # Metadata Management
 def get_project_location(ifc_file):
     site = ifc_file.by_type('IfcSite')
@@ -77,6 +104,18 @@ def get_project_location(ifc_file):
             return f"{lat_deg}° Latitude, {lon_deg}° Longitude"
     return "Not available"
 
+@st.cache_data(show_spinner=False)
+def _project_metadata(file_hash, file_path):
+    f = process_ifc_file(file_path, file_hash)
+    project = f.by_type('IfcProject')[0]
+    return {
+        "Name": project.Name,
+        "Description": project.Description,
+        "Phase": project.Phase,
+        "CreationDate": datetime.fromtimestamp(project.CreationDate) if hasattr(project, 'CreationDate') else 'Not available',
+        "Location": get_project_location(f)
+    }
+
 def display_metadata(ifc_file):
     project = ifc_file.by_type('IfcProject')
     if project:
@@ -95,83 +134,205 @@ def display_metadata(ifc_file):
         st.write(f"Location: {location}")
 
 # IFC Analysis Functions
-def count_building_components(ifc_file):
-    component_count = defaultdict(int)
+@st.cache_data(show_spinner=False)
+def _ifc_index(file_hash, file_path):
+    f = process_ifc_file(file_path, file_hash)
+    products = f.by_type('IfcProduct')
+    if not products:
+        return {}
+    # Extract once per entity, then count prefixes with vectorized pandas ops
+    types = [entity.is_a() for entity in products]
+    # fillna only covers missing names; empty strings belong in the Unnamed bucket too
+    names = pd.Series([entity.Name for entity in products], dtype="string").fillna('Unnamed').replace('', 'Unnamed')
+    prefixes = names.str.partition(':')[0]
+    counts = pd.DataFrame({'type': types, 'prefix': prefixes}).groupby(['type', 'prefix']).size()
+    index = defaultdict(dict)
+    for (type_name, prefix), count in counts.items():
+        index[type_name][prefix] = int(count)
+    return dict(index)
+
+@st.cache_data(show_spinner=False)
+def _product_types(file_hash, file_path):
+    import ifcopenshell
+    f = process_ifc_file(file_path, file_hash)
     try:
-        for ifc_entity in ifc_file.by_type('IfcProduct'):
-            component_count[ifc_entity.is_a()] += 1
+        schema = ifcopenshell.ifcopenshell_wrapper.schema_by_name(f.schema)
+
+        def subtypes(declaration):
+            for subtype in declaration.subtypes():
+                yield subtype
+                yield from subtypes(subtype)
+
+        product = schema.declaration_by_name('IfcProduct')
+        return sorted(t.name() for t in subtypes(product) if f.by_type(t.name(), include_subtypes=False))
+    except Exception as e:
+        logging.error(f"Schema-based product type enumeration failed, falling back to entity scan: {e}")
+        return sorted(_ifc_index(file_hash, file_path))
+
+def count_building_components(file_path, file_hash):
+    try:
+        return Counter({k: sum(v.values()) for k, v in _ifc_index(file_hash, file_path).items()})
     except Exception as e:
         error_message = f"Error processing IFC file: {e}"
         logging.error(error_message)
         st.error(error_message)
-    return component_count
+        return {}
+
+@st.cache_data(show_spinner=False)
+def _count_by_type(file_hash, file_path, product_type):
+    product_count = _ifc_index(file_hash, file_path).get(product_type, {})
+    return pd.Series(product_count, name='Count').sort_values(ascending=False).rename_axis('Type').reset_index()
 
-def detailed_analysis(ifc_file, product_type, sort_by=None):
-    product_count = defaultdict(int)
+def detailed_analysis(file_path, file_hash, product_type, sort_by=None):
     try:
-        for product in ifc_file.by_type(product_type):
-            product_name = product.Name if product.Name else "Unnamed"
-            type_name = product_name.split(':')[0] if product_name else "Unnamed"
-            product_count[type_name] += 1
+        df = _count_by_type(file_hash, file_path, product_type)
     except Exception as e:
         error_message = f"Error during detailed analysis: {e}"
         logging.error(error_message)
         st.error(error_message)
         return
 
-    labels, values = zip(*product_count.items()) if product_count else ((), ())
-    if values:
-        fig = px.pie(values=values, names=labels, title=f"Distribution of {product_type} Products by Type")
+    import plotly.graph_objects as go
+
+    labels, values = df['Type'].values, df['Count'].values
+    if len(values):
+        fig = go.Figure(go.Pie(labels=labels, values=values))
+        fig.update_layout(title=f"Distribution of {product_type} Products by Type")
         fig.update_layout(paper_bgcolor='white', plot_bgcolor='white', font_color='black')
         st.plotly_chart(fig)
 
         if sort_by:
-            df = pd.DataFrame({'Type': labels, 'Count': values}).sort_values(by=sort_by, ascending=False)
-            st.table(df)
+            st.table(df if sort_by == 'Count' else df.sort_values(by=sort_by, ascending=False))
     else:
         st.write(f"No products found for {product_type}.")
 
-def detailed_analysis_ui(ifc_file):
+def detailed_analysis_ui(file_path, file_hash):
     with st.expander("Show Detailed Component Analysis"):
-        product_types = sorted({entity.is_a() for entity in ifc_file.by_type('IfcProduct')})
+        product_types = _product_types(file_hash, file_path)
         selected_product_type = st.selectbox("Select a product type for detailed analysis", product_types, key="product_type")
         sort_by = st.select_slider("Sort by", ["Type", "Count"], value='Count', key="sort")
-        detailed_analysis(ifc_file, selected_product_type, sort_by)
+        detailed_analysis(file_path, file_hash, selected_product_type, sort_by)
 
 # Visualization Functions
+@st.cache_data(show_spinner=False)
+def _component_count_figure(counts_items, chart_type):
+    return visualize_component_count(dict(counts_items), chart_type)
+
 def visualize_component_count(component_count, chart_type='Bar Chart'):
-    labels, values = zip(*sorted(component_count.items(), key=lambda item: item[1], reverse=True)) if component_count else ((), ())
-    if chart_type == 'Bar Chart':
-        fig = px.bar(x=labels, y=values)
-    elif chart_type == 'Pie Chart':
-        fig = px.pie(values=values, names=labels)
-    fig.update_layout(transition_duration=500, paper_bgcolor='white', plot_bgcolor='white', font_color='black')
+    import plotly.graph_objects as go
+
+    # Single argsort pass; the arrays feed Plotly's typed-array transport directly
+    labels = np.fromiter(component_count.keys(), dtype=object, count=len(component_count))
+    values = np.fromiter(component_count.values(), dtype=np.int32, count=len(component_count))
+    order = np.argsort(-values)
+    labels, values = labels[order], values[order]
+    trace_builders = {
+        'Bar Chart': lambda: go.Bar(x=labels, y=values),
+        'Pie Chart': lambda: go.Pie(labels=labels, values=values),
+    }
+    fig = go.Figure(trace_builders.get(chart_type, trace_builders['Bar Chart'])())
+    with fig.batch_update():
+        fig.update_layout(paper_bgcolor='white', plot_bgcolor='white', font_color='black')
     return fig
 
 def visualize_data(df, columns):
-    figs = []
-    for column in columns:
-        if pd.api.types.is_numeric_dtype(df[column]):
-            fig = px.histogram(df, x=column)
-            fig.update_layout(paper_bgcolor='white', plot_bgcolor='white', font_color='black')
-            st.plotly_chart(fig)
-            figs.append(fig)
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
+    if not columns:
+        return []
+
+    # One figure and one websocket payload for all columns instead of a chart per loop pass
+    numeric = {column: pd.api.types.is_numeric_dtype(df[column]) for column in columns}
+    titles = [f"Histogram of {c}" if numeric[c] else f"Bar chart of {c}" for c in columns]
+    fig = make_subplots(rows=len(columns), cols=1, subplot_titles=titles)
+    for row, column in enumerate(columns, start=1):
+        if numeric[column]:
+            # Pre-bin server-side so only the bin counts go to the browser
+            counts, edges = np.histogram(df[column].dropna(), bins=50)
+            centers = (edges[:-1] + edges[1:]) / 2
+            fig.add_trace(go.Bar(x=centers, y=counts), row=row, col=1)
         else:
-            fig = px.bar(df, x=column, title=f"Bar chart of {column}")
-            fig.update_layout(paper_bgcolor='white', plot_bgcolor='white', font_color='black')
-            st.plotly_chart(fig)
-            figs.append(fig)
-    return figs
+            value_counts = df[column].value_counts()
+            fig.add_trace(go.Bar(x=value_counts.index, y=value_counts.values), row=row, col=1)
+    fig.update_layout(height=300 * len(columns), showlegend=False, paper_bgcolor='white', plot_bgcolor='white', font_color='black')
+    st.plotly_chart(fig)
+    return [fig]
+
+@st.cache_data(show_spinner=False)
+def _numeric_summary(file_hash, file_path, chunksize=50_000):
+    # The analysis page already holds the full frame in cache, so chunk the
+    # in-memory rows instead of re-reading the workbook from disk
+    numeric = _read_excel_cached(file_hash, file_path).select_dtypes(include=[np.number])
+    stats = {column: {'count': 0, 'mean': 0.0, 'm2': 0.0, 'min': np.nan, 'max': np.nan} for column in numeric.columns}
+    for start in range(0, len(numeric), chunksize):
+        chunk = numeric.iloc[start:start + chunksize]
+        for column, s in stats.items():
+            values = chunk[column].dropna().to_numpy(dtype=float)
+            n_b = len(values)
+            if not n_b:
+                continue
+            # Welford/Chan chunk merge; the sumsq - mean**2 form cancels
+            # catastrophically on large-magnitude columns
+            mean_b = values.mean()
+            m2_b = float(((values - mean_b) ** 2).sum())
+            n_a = s['count']
+            n = n_a + n_b
+            delta = mean_b - s['mean']
+            s['mean'] += delta * n_b / n
+            s['m2'] += m2_b + delta ** 2 * n_a * n_b / n
+            s['count'] = n
+            chunk_min, chunk_max = values.min(), values.max()
+            s['min'] = chunk_min if np.isnan(s['min']) else min(s['min'], chunk_min)
+            s['max'] = chunk_max if np.isnan(s['max']) else max(s['max'], chunk_max)
+    if not stats:
+        return None
+    summary = {}
+    for column, s in stats.items():
+        count = s['count']
+        summary[column] = {
+            'count': count,
+            'mean': s['mean'] if count else np.nan,
+            # Sample std to match df.describe(); NaN below two observations
+            'std': math.sqrt(s['m2'] / (count - 1)) if count > 1 else np.nan,
+            'min': s['min'],
+            'max': s['max']
+        }
+    return pd.DataFrame(summary)
 
-def generate_insights(df):
-    if not df.empty:
-        st.write("Descriptive Statistics:", df.describe())
-        # Placeholder for more sophisticated analysis or predictive modeling
+def generate_insights(file_path, file_hash):
+    summary = _numeric_summary(file_hash, file_path)
+    if summary is not None:
+        st.write("Descriptive Statistics:", summary)
+    else:
+        st.write("No numeric columns found for insights.")
 
 # PDF Export Function
+@functools.lru_cache(maxsize=None)
+def _kaleido_io():
+    # Configure the shared Kaleido scope once so figure exports reuse one renderer
+    import plotly.io as pio
+    try:
+        pio.kaleido.scope.default_format = 'png'
+        pio.kaleido.scope.default_width = 800
+    except AttributeError:
+        pass
+    return pio
+
+@functools.lru_cache(maxsize=32)
+def _render_figure_png(fig_json):
+    pio = _kaleido_io()
+    return pio.from_json(fig_json).to_image(format='png', engine='kaleido')
+
 def export_analysis_to_pdf(ifc_metadata, component_count, figs, author, subject, cover_text):
-    buffer = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
-    doc = SimpleDocTemplate(buffer.name, pagesize=letter)
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib import colors
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
+    from reportlab.lib.units import inch
+
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
     styles = getSampleStyleSheet()
     flowables = []
 
@@ -221,21 +382,26 @@ def export_analysis_to_pdf(ifc_metadata, component_count, figs, author, subject,
     flowables.append(component_table)
     flowables.append(Spacer(1, 0.5 * inch))
 
-    # Adding Images
-    for idx, fig in enumerate(figs):
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.png') as tmp_file:
+    # Adding Images; Kaleido renders in a subprocess, so exports overlap across threads
+    if figs:
+        for fig in figs:
+            fig.update_layout(paper_bgcolor='white', plot_bgcolor='white', font_color='black')
+        with ThreadPoolExecutor(max_workers=min(4, len(figs))) as executor:
+            futures = [executor.submit(_render_figure_png, fig.to_json()) for fig in figs]
+        for idx, future in enumerate(futures):
             try:
-                fig.update_layout(paper_bgcolor='white', plot_bgcolor='white', font_color='black')
-                fig.write_image(tmp_file.name, format='png', engine='kaleido')
-                flowables.append(Spacer(1, 0.5 * inch))
-                flowables.append(Paragraph(f"Chart {idx + 1}", styles['Heading2']))
-                flowables.append(Image(tmp_file.name))
+                png_bytes = future.result()
             except Exception as e:
                 logging.error(f"Error exporting chart to image: {e}")
                 st.error(f"Error exporting chart to image: {e}")
+                continue
+            flowables.append(Spacer(1, 0.5 * inch))
+            flowables.append(Paragraph(f"Chart {idx + 1}", styles['Heading2']))
+            flowables.append(Image(io.BytesIO(png_bytes)))
 
     doc.build(flowables)
-    return buffer.name
+    buffer.seek(0)
+    return buffer
 
 # Main Analysis Functions
 def ifc_file_analysis():
@@ -253,46 +419,44 @@ def ifc_file_analysis():
     5. **Export Analysis as PDF:** Click the "Export Analysis as PDF" button to download a PDF report of the analysis.
     """)
 
-    file_path, file_name = handle_file_upload("IFC", ['ifc'])
+    file_path, file_name, file_hash = handle_file_upload("IFC", ['ifc'])
     if file_path:
         with st.spinner('Processing IFC file...'):
-            ifc_file = process_ifc_file(file_path)
+            ifc_file = process_ifc_file(file_path, file_hash)
             if ifc_file:
                 display_metadata(ifc_file)
-                component_count = count_building_components(ifc_file)
+                component_count = count_building_components(file_path, file_hash)
                 chart_type = st.radio("Chart Type", options=['Bar Chart', 'Pie Chart'], key="chart")
-                fig = visualize_component_count(component_count, chart_type)
-                st.plotly_chart(fig)
-                detailed_analysis_ui(ifc_file)
-
-                ifc_metadata = {
-                    "Name": ifc_file.by_type('IfcProject')[0].Name,
-                    "Description": ifc_file.by_type('IfcProject')[0].Description,
-                    "Phase": ifc_file.by_type('IfcProject')[0].Phase,
-                    "CreationDate": datetime.fromtimestamp(ifc_file.by_type('IfcProject')[0].CreationDate) if hasattr(ifc_file.by_type('IfcProject')[0], 'CreationDate') else 'Not available',
-                    "Location": get_project_location(ifc_file)
-                }
+                fig = _component_count_figure(tuple(sorted(component_count.items())), chart_type)
+                # Animate only the on-screen copy; Kaleido honors transitions and
+                # would wait them out during PDF export
+                import plotly.graph_objects as go
+                screen_fig = go.Figure(fig)
+                screen_fig.update_layout(transition_duration=500)
+                st.plotly_chart(screen_fig)
+                detailed_analysis_ui(file_path, file_hash)
+
+                ifc_metadata = _project_metadata(file_hash, file_path)
 
                 figs = [fig]
 
-                # Get user inputs for cover page
-                author = st.text_input("Author", value="Mostafa Gabr")
-                subject = st.text_input("Main Subject", value="IFC and Excel File Analysis Report")
-                cover_text = st.text_area("Cover Page Text", value="This report contains the analysis of IFC and Excel files. The following sections include metadata, component counts, and visualizations of the data.")
+                # Get user inputs for cover page; a form avoids a rerun per keystroke
+                with st.form("pdf_export"):
+                    author = st.text_input("Author", value="Mostafa Gabr")
+                    subject = st.text_input("Main Subject", value="IFC and Excel File Analysis Report")
+                    cover_text = st.text_area("Cover Page Text", value="This report contains the analysis of IFC and Excel files. The following sections include metadata, component counts, and visualizations of the data.")
+                    submitted = st.form_submit_button("Export Analysis as PDF")
 
-                if st.button("Export Analysis as PDF"):
-                    pdf_file_path = export_analysis_to_pdf(ifc_metadata, component_count, figs, author, subject, cover_text)
-                    with open(pdf_file_path, 'rb') as f:
-                        st.download_button('Download PDF Report', f, file_name.replace('.ifc', '.pdf'))
-            os.remove(file_path)
+                if submitted:
+                    pdf_buffer = export_analysis_to_pdf(ifc_metadata, component_count, figs, author, subject, cover_text)
+                    st.download_button('Download PDF Report', pdf_buffer.getvalue(), file_name.replace('.ifc', '.pdf'))
+            # The tmp file stays alive for the session so the cached parse remains valid
 
-def save_ifc_file(ifc_file):
+def ifc_to_bytes(ifc_file):
     try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.ifc') as tmp_file:
-            ifc_file.write(tmp_file.name)
-            return tmp_file.name
+        return ifc_file.wrapped_data.to_string().encode()
     except Exception as e:
-        error_message = f"Error saving IFC file: {e}"
+        error_message = f"Error serializing IFC file: {e}"
         logging.error(error_message)
         st.error(error_message)
         return None
@@ -311,42 +475,41 @@ def excel_file_analysis():
     4. **Generate Insights:** Click on "Generate Insights" to view descriptive statistics and other insights from the data.
     """)
 
-    file_path, _ = handle_file_upload("Excel", ['xlsx'])
+    file_path, _, file_hash = handle_file_upload("Excel", ['xlsx'])
     if file_path:
-        df = read_excel(file_path)
+        df = _read_excel_cached(file_hash, file_path)
         if not df.empty:
-            selected_columns = st.multiselect("Select columns to display", df.columns.tolist(), default=df.columns.tolist(), key="columns")
+            all_columns = st.session_state.setdefault(f'cols_{file_hash}', tuple(df.columns))
+            selected_columns = st.multiselect("Select columns to display", all_columns, default=all_columns, key="columns")
             if selected_columns:
                 st.dataframe(df[selected_columns])
                 figs = []
                 if st.button("Visualize Data", key="visualize"):
                     figs = visualize_data(df, selected_columns)
                 if st.button("Generate Insights", key="insights"):
-                    generate_insights(df)
+                    generate_insights(file_path, file_hash)
                 if figs and st.button("Export Analysis as PDF"):
-                    pdf_file_path = export_analysis_to_pdf({"Name": "Excel Data Analysis"}, {}, figs, "Author Name", "Excel Data Analysis Report", "This report contains the analysis of Excel data.")
-                    with open(pdf_file_path, 'rb') as f:
-                        st.download_button('Download PDF Report', f, 'excel_analysis.pdf')
-            os.remove(file_path)
+                    pdf_buffer = export_analysis_to_pdf({"Name": "Excel Data Analysis"}, {}, figs, "Author Name", "Excel Data Analysis Report", "This report contains the analysis of Excel data.")
+                    st.download_button('Download PDF Report', pdf_buffer.getvalue(), 'excel_analysis.pdf')
 
 # Comparison Analysis Functions
-def compare_ifc_files(ifc_file1, ifc_file2):
-    components1 = count_building_components(ifc_file1)
-    components2 = count_building_components(ifc_file2)
-
-    comparison_result = defaultdict(dict)
-    all_component_types = set(components1.keys()) | set(components2.keys())
-
-    for component_type in all_component_types:
-        count1 = components1.get(component_type, 0)
-        count2 = components2.get(component_type, 0)
-        comparison_result[component_type]['File 1 Count'] = count1
-        comparison_result[component_type]['File 2 Count'] = count2
-        comparison_result[component_type]['Difference'] = count1 - count2
-
+# Below this size the thread-pool overhead outweighs the parallel parse
+_PARALLEL_PARSE_MIN_BYTES = 8 * 1024 * 1024
+
+def compare_ifc_files(file_path1, file_path2, file_hash1, file_hash2):
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        counts1, counts2 = executor.map(
+            lambda args: count_building_components(*args),
+            [(file_path1, file_hash1), (file_path2, file_hash2)])
+    s1 = pd.Series(counts1)
+    s2 = pd.Series(counts2)
+    comparison_result = pd.concat([s1, s2], axis=1, keys=['File 1 Count', 'File 2 Count']).fillna(0).astype(int)
+    comparison_result['Difference'] = comparison_result['File 1 Count'] - comparison_result['File 2 Count']
     return comparison_result
 
 def compare_ifc_files_ui():
+    import plotly.graph_objects as go
+
     st.title("Compare IFC Files")
     st.write("""
     ### Instructions for Comparing IFC Files:
@@ -366,21 +529,31 @@ def compare_ifc_files_ui():
     This step-by-step process will help you understand the detailed differences in building components between the two IFC files, as well as provide an overall summary of the differences.
     """)
 
-    file_path1, file_name1 = handle_file_upload("first IFC", ['ifc'])
-    file_path2, file_name2 = handle_file_upload("second IFC", ['ifc'])
+    file_path1, file_name1, file_hash1 = handle_file_upload("first IFC", ['ifc'])
+    file_path2, file_name2, file_hash2 = handle_file_upload("second IFC", ['ifc'])
 
     if file_path1 and file_path2:
         with st.spinner('Processing IFC files...'):
-            ifc_file1 = process_ifc_file(file_path1)
-            ifc_file2 = process_ifc_file(file_path2)
+            if min(os.path.getsize(file_path1), os.path.getsize(file_path2)) > _PARALLEL_PARSE_MIN_BYTES:
+                # ifcopenshell parses in C++ and releases the GIL, so both files load concurrently
+                with ThreadPoolExecutor(max_workers=2) as executor:
+                    ifc_file1, ifc_file2 = executor.map(process_ifc_file, [file_path1, file_path2], [file_hash1, file_hash2])
+                # st.error inside the workers has no ScriptRunContext and is
+                # dropped, so report parse failures from the main thread
+                for name, handle in ((file_name1, ifc_file1), (file_name2, ifc_file2)):
+                    if handle is None:
+                        st.error(f"Error opening IFC file: {name}")
+            else:
+                ifc_file1 = process_ifc_file(file_path1, file_hash1)
+                ifc_file2 = process_ifc_file(file_path2, file_hash2)
             if ifc_file1 and ifc_file2:
-                comparison_result = compare_ifc_files(ifc_file1, ifc_file2)
-                all_component_types = list(comparison_result.keys())
+                comparison_result = compare_ifc_files(file_path1, file_path2, file_hash1, file_hash2)
+                all_component_types = list(comparison_result.index)
                 selected_component = st.selectbox("Select a component type for detailed comparison:", all_component_types, key="component_type")
 
                 figs = []
                 if selected_component:
-                    component_data = comparison_result[selected_component]
+                    component_data = comparison_result.loc[selected_component]
                     fig = go.Figure(data=[
                         go.Bar(name=f"{file_name1} - File 1", x=[selected_component], y=[component_data['File 1 Count']], marker_color='indianred'),
                         go.Bar(name=f"{file_name2} - File 2", x=[selected_component], y=[component_data['File 2 Count']], marker_color='lightseagreen'),
@@ -391,22 +564,28 @@ def compare_ifc_files_ui():
                     figs.append(fig)
 
                     if st.button("Show Overall Comparison"):
-                        differences = [comparison_result[comp]['Difference'] for comp in all_component_types]
-                        fig_pie = go.Figure(data=[go.Pie(labels=all_component_types, values=differences, title=f'Overall Differences in Components between {file_name1} and {file_name2}')])
+                        # Keep the pie to a bounded number of slices so the browser render stays flat
+                        diffs = comparison_result['Difference'].abs().sort_values(ascending=False)
+                        top = diffs.head(20)
+                        labels, values = list(top.index), list(top.values)
+                        other = diffs.iloc[20:].sum()
+                        if other:
+                            labels.append('Other')
+                            values.append(other)
+                        fig_pie = go.Figure(data=[go.Pie(labels=np.asarray(labels, dtype=object), values=np.asarray(values, dtype=np.int64), title=f'Overall Differences in Components between {file_name1} and {file_name2}')])
+                        fig_pie.update_traces(sort=False)
                         fig_pie.update_layout(paper_bgcolor='white', plot_bgcolor='white', font_color='black')
                         st.plotly_chart(fig_pie)
                         figs.append(fig_pie)
 
                 if figs and st.button("Export Analysis as PDF"):
-                    pdf_file_path = export_analysis_to_pdf({"Name": "IFC Files Comparison"}, {}, figs, "Author Name", "IFC Files Comparison Report", "This report contains the comparison analysis of two IFC files.")
-                    with open(pdf_file_path, 'rb') as f:
-                        st.download_button('Download PDF Report', f, 'ifc_comparison.pdf')
-
-            os.remove(file_path1)
-            os.remove(file_path2)
+                    pdf_buffer = export_analysis_to_pdf({"Name": "IFC Files Comparison"}, {}, figs, "Author Name", "IFC Files Comparison Report", "This report contains the comparison analysis of two IFC files.")
+                    st.download_button('Download PDF Report', pdf_buffer.getvalue(), 'ifc_comparison.pdf')
 
 # Add new functionalities for detailed object data extraction and display
 def get_objects_data_by_class(file, class_type):
+    import ifcopenshell.util.element as Element
+
     def add_pset_attributes(psets):
         for pset_name, pset_data in psets.items():
             for property_name in pset_data.keys():
@@ -417,33 +596,43 @@ def get_objects_data_by_class(file, class_type):
     objects = file.by_type(class_type)
       
     for obj in objects:
-        psets = Element.get_psets(obj, psets_only=True)
+        # One inverse-relationship walk per object; split psets/qtos locally
+        psets, qtos = {}, {}
+        for pset_name, pset_data in Element.get_psets(obj).items():
+            pset_id = pset_data.get('id')
+            if pset_id is not None and file.by_id(pset_id).is_a('IfcElementQuantity'):
+                qtos[pset_name] = pset_data
+            else:
+                psets[pset_name] = pset_data
         add_pset_attributes(psets)
-        qtos = Element.get_psets(obj, qtos_only=True)
         add_pset_attributes(qtos)
+        container = Element.get_container(obj)
+        obj_type = Element.get_type(obj)
         objects_data.append({
             "ExpressId": obj.id(),
             "GlobalId": getattr(obj, 'GlobalId', None),
             "Class": obj.is_a(),
             "PredefinedType": Element.get_predefined_type(obj),
             "Name": getattr(obj, 'Name', None),
-            "Level": Element.get_container(obj).Name if Element.get_container(obj) else "",
-            "Type": Element.get_type(obj).Name if Element.get_type(obj) else "",
+            "Level": container.Name if container else "",
+            "Type": obj_type.Name if obj_type else "",
             "QuantitySets": qtos,
             "PropertySets": psets,
         })
     return objects_data, list(pset_attributes)
 
-def get_attribute_value(object_data, attribute):
-    if "." not in attribute:
-        return object_data.get(attribute, None)
-    elif "." in attribute:
-        pset_name, prop_name = attribute.split(".", 1)
-        if pset_name in object_data["PropertySets"]:
-            return object_data["PropertySets"][pset_name].get(prop_name, None)
-        if pset_name in object_data["QuantitySets"]:
-            return object_data["QuantitySets"][pset_name].get(prop_name, None)
-    return None
+@st.cache_data(show_spinner=False)
+def _objects_data_by_class(file_hash, file_path, class_type):
+    return get_objects_data_by_class(process_ifc_file(file_path, file_hash), class_type)
+
+@st.cache_data(show_spinner=False)
+def _all_classes(file_hash, file_path):
+    f = process_ifc_file(file_path, file_hash)
+    try:
+        # C-level set of instantiated types; avoids touching every entity in Python
+        return sorted(f.wrapped_data.types())
+    except AttributeError:
+        return sorted({entity.is_a() for entity in f})
 
 def display_detailed_object_data():
     try:
@@ -479,23 +668,20 @@ def display_detailed_object_data():
         - You can download the detailed object data as a CSV file by clicking the "Download data as CSV" button. This allows you to further analyze the data offline or integrate it with other tools.
         """)
 
-        file_path, file_name = handle_file_upload("IFC", ['ifc'])
+        file_path, file_name, file_hash = handle_file_upload("IFC", ['ifc'])
         if file_path:
             with st.spinner('Processing IFC file...'):
-                ifc_file = process_ifc_file(file_path)
+                ifc_file = process_ifc_file(file_path, file_hash)
                 if ifc_file:
-                    all_classes = set(entity.is_a() for entity in ifc_file)
-                    class_type = st.selectbox('Select Class Type', sorted(all_classes))
-
-                    data, pset_attributes = get_objects_data_by_class(ifc_file, class_type)
-                    attributes = ["ExpressId", "GlobalId", "Class", "PredefinedType", "Name", "Level", "Type"] + pset_attributes
+                    class_type = st.selectbox('Select Class Type', _all_classes(file_hash, file_path))
 
-                    pandas_data = []
-                    for object_data in data:
-                        row = [get_attribute_value(object_data, attribute) for attribute in attributes]
-                        pandas_data.append(tuple(row))
+                    data, pset_attributes = _objects_data_by_class(file_hash, file_path, class_type)
 
-                    dataframe = pd.DataFrame.from_records(pandas_data, columns=attributes)
+                    # Build all columns at once; per-cell Python lookups fragment the frame
+                    base_df = pd.DataFrame.from_records(data)
+                    pset_df = pd.json_normalize(base_df.pop('PropertySets'), max_level=1)
+                    qto_df = pd.json_normalize(base_df.pop('QuantitySets'), max_level=1)
+                    dataframe = pd.concat([base_df, pset_df, qto_df], axis=1)
 
                     st.subheader("Detailed Object Data")
                     st.write(dataframe)
@@ -507,9 +693,15 @@ def display_detailed_object_data():
                     else:
                         st.write("Columns 'Level' and 'Type' not found in the data.")
 
+                    # Shrink repetitive string columns and stream the CSV straight to bytes
+                    for col in ('Class', 'Level', 'Type'):
+                        if col in dataframe:
+                            dataframe[col] = dataframe[col].astype('category')
+                    csv_buffer = io.BytesIO()
+                    dataframe.to_csv(csv_buffer, index=False, encoding='utf-8')
                     st.download_button(
                         label="Download data as CSV",
-                        data=dataframe.to_csv(index=False).encode('utf-8'),
+                        data=csv_buffer.getvalue(),
                         file_name='ifc_data.csv',
                         mime='text/csv',
                     )
@@ -530,47 +722,53 @@ def display_detailed_object_data():
 
                     # Display windows data
                     display_window_data(ifc_file)
-
-                    os.remove(file_path)
     except Exception as e:
         logging.error(f"Error in display_detailed_object_data: {e}")
         st.error(f"Error in display_detailed_object_data: {e}")
 
 # Add new functionalities for window data extraction and display
-def get_window_orientation(window):
+def get_window_direction(window):
     try:
-        if hasattr(window, 'ObjectPlacement') and window.ObjectPlacement is not None:
-            if hasattr(window.ObjectPlacement, 'RelativePlacement') and window.ObjectPlacement.RelativePlacement is not None:
-                placement = window.ObjectPlacement.RelativePlacement
-                if hasattr(placement, 'RefDirection') and placement.RefDirection is not None:
-                    direction = placement.RefDirection.DirectionRatios
-                    logging.info(f"Window {window.GlobalId} direction: {direction}")
-                    if direction:
-                        azimuth = math.degrees(math.atan2(direction[1], direction[0])) % 360
-                        return {
-                            'Orientation': 'East' if direction[0] > 0 else 'West' if direction[0] < 0 else 'North' if direction[1] > 0 else 'South',
-                            'Azimuth': azimuth
-                        }
+        placement = getattr(window, 'ObjectPlacement', None)
+        relative_placement = getattr(placement, 'RelativePlacement', None)
+        ref_direction = getattr(relative_placement, 'RefDirection', None)
+        if ref_direction is None:
+            return None
+        direction = ref_direction.DirectionRatios
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Window %s direction: %s", window.GlobalId, direction)
+        if direction:
+            return direction[0], direction[1]
     except Exception as e:
         logging.error(f"Error determining window orientation: {e}")
-    return {'Orientation': 'Unknown', 'Azimuth': None}
+    return None
 
 def extract_window_data(ifc_file):
-    windows_data = []
     windows = ifc_file.by_type('IfcWindow')
-    
+    if not windows:
+        return pd.DataFrame()
+
+    global_ids, names, directions = [], [], []
+    log_windows = logger.isEnabledFor(logging.DEBUG)
     for window in windows:
-        logging.info(f"Processing window {window.GlobalId} with name {window.Name}")
-        orientation_data = get_window_orientation(window)
-        window_data = {
-            "GlobalId": window.GlobalId,
-            "Name": window.Name,
-            "Orientation": orientation_data['Orientation'],
-            "Azimuth": orientation_data['Azimuth']
-        }
-        windows_data.append(window_data)
-    
-    return pd.DataFrame(windows_data)
+        if log_windows:
+            logger.debug("Processing window %s with name %s", window.GlobalId, window.Name)
+        global_ids.append(window.GlobalId)
+        names.append(window.Name)
+        directions.append(get_window_direction(window) or (np.nan, np.nan))
+
+    # One vectorized pass for all azimuths/orientations instead of per-window trig
+    directions = np.asarray(directions, dtype=float)
+    dx, dy = directions[:, 0], directions[:, 1]
+    azimuths = (np.degrees(np.arctan2(dy, dx)) % 360).astype(np.float32)
+    orientations = np.select([dx > 0, dx < 0, dy > 0, dy < 0], ['East', 'West', 'North', 'South'], default='Unknown')
+
+    return pd.DataFrame({
+        "GlobalId": global_ids,
+        "Name": names,
+        "Orientation": orientations,
+        "Azimuth": azimuths
+    })
 
 def display_window_data(ifc_file):
     st.subheader("Windows Information")